@@ -2,31 +2,447 @@
 """
 Reddit Comment Privacy Script
 - Processes comments from oldest to newest
-- Deletes any comments already edited to replacement text
-- Edits and optionally deletes comments older than a specified threshold
+- Only touches comments older than a specified threshold
+- Deletes any of them already edited to replacement text (or a common one like "[deleted]")
+- Deletes the rest, editing them first with --paranoid-overwrite, or only edits them with --no-delete
 """
 
+import argparse
+import logging
+import math
 import praw
+import requests
+import os
+import queue
+import re
+import sqlite3
+import threading
 import time
 import sys
-from datetime import datetime, timedelta
+from collections import Counter, deque
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from praw.exceptions import PRAWException, RedditAPIException
+from prawcore.exceptions import ServerError, TooManyRequests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Per-thread state for pool workers; PRAW instances must not be shared between threads
+_worker = threading.local()
+# Set on Ctrl-C so workers stop sleeping off rate limits instead of holding up shutdown
+_interrupted = threading.Event()
+
+# Environment variables holding the Reddit app credentials
+CREDENTIAL_ENV_VARS = ("REDDIT_CLIENT_ID", "REDDIT_CLIENT_SECRET", "REDDIT_USERNAME", "REDDIT_PASSWORD")
+
+# Client-side request budget shared by all workers, kept under Reddit's 100 requests/minute
+REQUESTS_PER_MINUTE = 95
+REQUEST_BURST = 100
+
+# Sleep until the rate limit window resets once this few requests remain
+RATELIMIT_MIN_REMAINING = 2
+RATELIMIT_MIN_RATIO = 0.1
+
+SECONDS_PER_DAY = 86400
+
+# Replacement texts commonly left behind by earlier runs, treated as already edited
+KNOWN_EDIT_TEXTS = frozenset({"[deleted]", "[removed]", "F", "."})
+
+# Bounds for the number of edit/delete requests in flight at once
+MIN_CONCURRENCY = 1
+INITIAL_CONCURRENCY = 2
+MAX_CONCURRENCY = 8
+# Grow concurrency while the mean latency of recent requests stays under this many seconds
+LATENCY_TARGET = 1.5
+LATENCY_WINDOW = 20
+
+# Archive of Reddit comments used to find history beyond the ~1000 item listing cap
+ARCHIVE_URL = "https://arctic-shift.photon-reddit.com/api/comments/search"
+ARCHIVE_PAGE_SIZE = 100
+
+# Local record of comments handled by earlier runs, committed every DB_COMMIT_EVERY rows
+DB_PATH = os.path.expanduser("~/.reddit_privacy.db")
+DB_COMMIT_EVERY = 50
+
+# Comments fetched ahead of processing with --stream
+STREAM_QUEUE_SIZE = 200
 
 def create_reddit_instance():
     """Create and return Reddit instance with user credentials"""
     
     # You'll need to create an app at https://www.reddit.com/prefs/apps
-    # Select "script" as the app type
+    # Select "script" as the app type, then export its credentials
+    missing = [name for name in CREDENTIAL_ENV_VARS if not os.environ.get(name)]
+    if missing:
+        raise RuntimeError(f"Missing environment variables: {', '.join(missing)}")
+    
+    username = os.environ["REDDIT_USERNAME"]
     reddit = praw.Reddit(
-        client_id="YOUR_CLIENT_ID",        # From your app
-        client_secret="YOUR_CLIENT_SECRET", # From your app
-        username="YOUR_USERNAME",           # Your Reddit username
-        password="YOUR_PASSWORD",           # Your Reddit password
-        user_agent="Comment Privacy Script by /u/YOUR_USERNAME"
+        client_id=os.environ["REDDIT_CLIENT_ID"],          # From your app
+        client_secret=os.environ["REDDIT_CLIENT_SECRET"],  # From your app
+        username=username,                                 # Your Reddit username
+        password=os.environ["REDDIT_PASSWORD"],            # Your Reddit password
+        user_agent=os.environ.get("REDDIT_USER_AGENT", f"Comment Privacy Script by /u/{username}")
     )
     
+    # Each worker thread has its own instance, so its requests session sends one
+    # request at a time and its default pool already keeps the connection alive.
+    # Status codes are left to prawcore, which raises the errors the concurrency
+    # controller backs off on, so only connection failures are retried here.
+    core = reddit._core
+    # prawcore 3 made the requestor public; older releases keep it private
+    requestor = getattr(core, "requestor", None) or core._requestor
+    session = requestor._http
+    adapter = HTTPAdapter(max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.5))
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    
     return reddit
 
-def process_comments(reddit, edit_text="[deleted]", delete_after_edit=True, dry_run=False, days_threshold=30):
+def fetch_all_comment_ids_via_archive(username):
+    """Return the ids of every archived comment by a user, oldest first"""
+    
+    ids = []
+    seen = set()
+    after = None
+    with requests.Session() as session:
+        while True:
+            params = {"author": username, "limit": ARCHIVE_PAGE_SIZE, "sort": "asc", "fields": "id,created_utc"}
+            if after is not None:
+                params["after"] = after
+            response = session.get(ARCHIVE_URL, params=params, timeout=30)
+            response.raise_for_status()
+            page = response.json()["data"]
+            
+            # Pages overlap by a second so comments sharing a timestamp aren't lost
+            new_ids = [item["id"] for item in page if item["id"] not in seen]
+            if not new_ids:
+                break
+            ids.extend(new_ids)
+            seen.update(new_ids)
+            if len(page) < ARCHIVE_PAGE_SIZE:
+                break
+            after = int(page[-1]["created_utc"]) - 1
+    return ids
+
+def fetch_comments_by_id(reddit, comment_ids):
+    """Yield the current state of comments by id, skipping ones that are already deleted"""
+    
+    # reddit.info looks up 100 fullnames per request
+    for comment in reddit.info(fullnames=[f"t1_{comment_id}" for comment_id in comment_ids]):
+        if comment.author is not None:
+            yield comment
+
+def open_state_db(path=DB_PATH, read_only=False):
+    """
+    Open the local database of processed comments, creating it if needed
+    
+    With read_only the file is neither created nor written to: its contents, if any,
+    are copied into an in-memory database that is discarded when closed.
+    """
+    
+    if read_only:
+        conn = sqlite3.connect(":memory:")
+        if os.path.exists(path):
+            source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            source.backup(conn)
+            source.close()
+    else:
+        conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS processed (id TEXT PRIMARY KEY, ts INTEGER, action TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
+    return conn
+
+def get_latest_seen(conn):
+    """Return the fullname the listing can stop at, or None to fetch everything"""
+    
+    row = conn.execute("SELECT value FROM metadata WHERE key = 'latest_seen'").fetchone()
+    return row[0] if row else None
+
+def set_latest_seen(conn, fullname):
+    """Store the fullname the next run's listing should stop at"""
+    
+    conn.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES ('latest_seen', ?)", (fullname,))
+
+def clear_latest_seen(conn):
+    """Forget the stored cursor so the next run lists every comment"""
+    
+    conn.execute("DELETE FROM metadata WHERE key = 'latest_seen'")
+
+def next_latest_seen(all_comments, finished):
+    """
+    Return the newest comment every older comment has been handled before, or None
+    
+    Only comments that were edited but kept can anchor the listing; deleted ones
+    no longer appear in it. Stops at the first comment that was skipped or failed
+    so it gets fetched again next run.
+    """
+    
+    latest_seen = None
+    for comment in all_comments:  # oldest first
+        action = finished.get(comment.id)
+        if action is None:
+            break
+        if action == "edited":
+            latest_seen = f"t1_{comment.id}"
+    return latest_seen
+
+def record_processed(conn, comment_id, action):
+    """Remember what was done to a comment so later runs can skip it"""
+    
+    conn.execute(
+        "INSERT OR REPLACE INTO processed (id, ts, action) VALUES (?, ?, ?)",
+        (comment_id, int(time.time()), action),
+    )
+
+def wait_if_throttled(reddit):
+    """Sleep until the rate limit resets if the request budget is nearly spent"""
+    
+    # PRAW tracks the x-ratelimit-* headers of the last response
+    limits = reddit.auth.limits
+    remaining = limits.get("remaining")
+    used = limits.get("used")
+    if remaining is None or used is None:
+        return
+    
+    total = remaining + used
+    remaining_ratio = remaining / total if total else 0
+    if remaining > RATELIMIT_MIN_REMAINING and remaining_ratio >= RATELIMIT_MIN_RATIO:
+        return
+    
+    # Current prawcore only keeps the time of the next allowed request (on the
+    # monotonic clock); PRAW before 7.8 reported the window reset in auth.limits
+    rate_limiter = getattr(reddit._core, "_rate_limiter", None) or getattr(reddit._core, "rate_limiter", None)
+    next_request_ns = getattr(rate_limiter, "next_request_timestamp_ns", None)
+    if next_request_ns is not None:
+        wait = (next_request_ns - time.monotonic_ns()) / 1e9
+    elif limits.get("reset_timestamp") is not None:
+        wait = limits["reset_timestamp"] - time.time()
+    else:
+        logger.warning("Rate limit nearly reached (%.0f requests left) but its reset time is unknown", remaining)
+        return
+    
+    wait = max(0, wait)
+    logger.info("Rate limit nearly reached (%.0f requests left), waiting %.0f seconds...", remaining, wait)
+    _interrupted.wait(wait)
+
+def ratelimit_delay(exception):
+    """Return the seconds Reddit asked us to wait in a RATELIMIT error, or None"""
+    
+    for item in exception.items:
+        if item.error_type != "RATELIMIT":
+            continue
+        # e.g. "Looks like you've been doing that a lot. Take a break for 5 minutes before trying again."
+        # or "Take a break for 545 milliseconds before trying again."
+        match = re.search(r"(\d+) (millisecond|second|minute)", item.message)
+        if not match:
+            return 60
+        amount = int(match.group(1))
+        if match.group(2) == "minute":
+            return amount * 60
+        if match.group(2) == "millisecond":
+            return max(1, math.ceil(amount / 1000))
+        return max(1, amount)
+    return None
+
+class Interrupted(Exception):
+    """Raised in a worker whose request was abandoned because the run was interrupted"""
+
+class TokenBucket:
+    """Thread-safe token bucket that spaces requests out to a steady rate"""
+    
+    def __init__(self, rate=REQUESTS_PER_MINUTE / 60, capacity=REQUEST_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # Reserve the token now, even if that leaves the bucket in debt, so
+            # threads waiting at the same time queue up instead of sharing a token
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait and _interrupted.wait(wait):
+            raise Interrupted()
+
+def call_with_ratelimit(reddit, bucket, action, *args):
+    """
+    Call a PRAW action, retrying once after a RATELIMIT error, then throttle if needed
+    
+    Returns the latency of the request in seconds. Time spent waiting for a token
+    or sleeping off a rate limit is left out so it doesn't look like a slow server.
+    """
+    
+    bucket.acquire()
+    start = time.monotonic()
+    try:
+        action(*args)
+    except RedditAPIException as e:
+        delay = ratelimit_delay(e)
+        if delay is None:
+            raise
+        logger.warning("Rate limited by Reddit, retrying in %d seconds...", delay)
+        if _interrupted.wait(delay):
+            raise Interrupted()
+        bucket.acquire()
+        start = time.monotonic()
+        action(*args)
+    latency = time.monotonic() - start
+    
+    wait_if_throttled(reddit)
+    return latency
+
+class ConcurrencyController:
+    """Additive-increase/multiplicative-decrease limit on in-flight requests"""
+    
+    def __init__(self, initial=INITIAL_CONCURRENCY, maximum=MAX_CONCURRENCY):
+        self.limit = initial
+        self.maximum = maximum
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+    
+    def record_success(self, latency):
+        """Allow one more request in flight while recent latency is good"""
+        self.latencies.append(latency)
+        mean_latency = sum(self.latencies) / len(self.latencies)
+        if mean_latency <= LATENCY_TARGET:
+            self.limit = min(self.maximum, self.limit + 1)
+    
+    def record_failure(self):
+        """Halve the requests in flight after a rate limit or server error"""
+        self.limit = max(MIN_CONCURRENCY, int(self.limit * 0.5))
+        self.latencies.clear()
+
+def _init_worker(reddit_factory):
+    """Give a pool thread its own Reddit instance, as PRAW is not thread-safe"""
+    
+    _worker.reddit = reddit_factory()
+
+def _delete(bucket, comment):
+    """Delete a comment, returning the request latency in seconds"""
+    
+    # /api/del takes a single fullname and answers {} even for ids it ignores, so
+    # bundled ids can't be confirmed; deletes go out one per request over a
+    # keep-alive session and are parallelised by the thread pool instead
+    reddit = _worker.reddit
+    # A lazy comment on this thread's instance; delete needs no prior fetch
+    target = reddit.comment(id=comment.id)
+    return call_with_ratelimit(reddit, bucket, target.delete)
+
+def _edit_and_maybe_delete(bucket, comment, edit_text, delete_after_edit):
+    """Edit a comment and optionally delete it, returning the mean request latency in seconds"""
+    
+    reddit = _worker.reddit
+    # A lazy comment on this thread's instance; edit and delete need no prior fetch
+    target = reddit.comment(id=comment.id)
+    latencies = [call_with_ratelimit(reddit, bucket, target.edit, edit_text)]
+    if delete_after_edit:
+        latencies.append(call_with_ratelimit(reddit, bucket, target.delete))
+    return sum(latencies) / len(latencies)
+
+def already_edited_check(edit_text, include_known_texts=True):
+    """Return a predicate telling whether a comment already carries a replacement text"""
+    
+    # Bodies matching any known replacement text have already been edited. Without
+    # include_known_texts only edit_text counts, so a comment that really just said
+    # "F" or "." is still treated as the user's own text
+    known_edit_texts = KNOWN_EDIT_TEXTS | {edit_text} if include_known_texts else {edit_text}
+    max_edit_text_len = max(len(text) for text in known_edit_texts)
+    
+    def is_already_edited(comment):
+        # Cheap length test first so long original bodies skip the set lookup
+        return len(comment.body) <= max_edit_text_len and comment.body in known_edit_texts
+    
+    return is_already_edited
+
+def partition_comments(all_comments, edit_text, threshold_ts, processed_ids=frozenset(), include_known_texts=True):
+    """
+    Split comments sorted oldest first into the work to do, without touching Reddit
+    
+    Returns:
+        (to_delete_only, to_edit, skipped, previously_deleted): comments already
+        carrying a replacement text, comments still to be edited, and the number
+        too recent to touch or deleted by an earlier run
+    """
+    
+    is_already_edited = already_edited_check(edit_text, include_known_texts)
+    to_delete_only = []
+    to_edit = []
+    skipped = 0
+    previously_deleted = 0
+    for index, comment in enumerate(all_comments):
+        # Once one comment is too recent all the following ones are as well
+        if comment.created_utc >= threshold_ts:
+            skipped = len(all_comments) - index
+            break
+        if comment.id in processed_ids:
+            previously_deleted += 1
+            continue
+        if is_already_edited(comment):
+            to_delete_only.append(comment)
+        else:
+            to_edit.append(comment)
+    return to_delete_only, to_edit, skipped, previously_deleted
+
+def iter_user_comments(reddit, user, latest_seen=None, use_archive=False, processed_ids=frozenset()):
+    """Yield the user's comments from the live listing, newest first, then any extra ones from the archive"""
+    
+    # Page newest first and stop at the stored cursor; everything older was handled by
+    # an earlier run. If the cursor comment has since vanished this is a full listing
+    if latest_seen:
+        logger.info("Fetching comments newer than %s...", latest_seen)
+    else:
+        logger.info("Fetching all comments...")
+    anchor_id = latest_seen[3:] if latest_seen else None
+    
+    seen_ids = set()
+    for comment in user.comments.new(limit=None):
+        if comment.id == anchor_id:
+            break
+        seen_ids.add(comment.id)
+        yield comment
+    
+    # The live listing stops around 1000 comments; the archive has the rest of the
+    # history but may lag by hours, so recent comments still come from the listing
+    if use_archive:
+        logger.info("Fetching comment history from the archive...")
+        archived_ids = [
+            comment_id for comment_id in fetch_all_comment_ids_via_archive(user.name)
+            if comment_id not in seen_ids and comment_id not in processed_ids
+        ]
+        logger.info("Found %d additional comments in the archive", len(archived_ids))
+        yield from fetch_comments_by_id(reddit, archived_ids)
+
+def _produce_comments(comments, comment_queue, errors):
+    """Feed comments into a queue for the processing loop, ending with None"""
+    
+    try:
+        for comment in comments:
+            comment_queue.put(comment)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        comment_queue.put(None)
+
+def process_comments(
+    reddit,
+    edit_text="[deleted]",
+    delete_after_edit=True,
+    dry_run=False,
+    days_threshold=30,
+    db_path=DB_PATH,
+    use_archive=False,
+    max_concurrency=MAX_CONCURRENCY,
+    overwrite_before_delete=False,
+    stream=False,
+    reddit_factory=create_reddit_instance,
+):
     """
     Process comments older than the threshold for the authenticated user
     
@@ -36,171 +452,339 @@ def process_comments(reddit, edit_text="[deleted]", delete_after_edit=True, dry_
         delete_after_edit: Whether to delete after editing (default: True)
         dry_run: If True, only preview what would happen without making changes
         days_threshold: Only process comments older than this many days (default: 30)
+        db_path: SQLite file recording comments deleted by earlier runs (default: ~/.reddit_privacy.db)
+        use_archive: Also find older comments through the Arctic Shift archive (default: False)
+        max_concurrency: Upper bound on edit/delete requests in flight (default: 8)
+        overwrite_before_delete: Edit comments before deleting them instead of only deleting (default: False)
+        stream: Start processing while comments are still being fetched, newest first (default: False)
+        reddit_factory: Creates the separate Reddit instance each worker thread uses (default: create_reddit_instance)
     """
     
     # Get the authenticated user
     user = reddit.user.me()
-    print(f"Processing comments for user: {user.name}")
+    logger.info("Processing comments for user: %s", user.name)
+    
+    # Deleting makes an edit pointless unless the text should be overwritten first,
+    # e.g. so archives that re-scrape before the delete propagates see the replacement
+    edit_first = not delete_after_edit or overwrite_before_delete
+    
+    # Comments created at or after this timestamp are too recent to touch
+    now_ts = int(time.time())
+    threshold_ts = now_ts - days_threshold * SECONDS_PER_DAY
+    
+    # Comments deleted by earlier runs don't need to be looked at again
+    # A dry run reads earlier runs' state but never writes any
+    conn = open_state_db(db_path, read_only=dry_run)
+    processed_ids = {row[0] for row in conn.execute("SELECT id FROM processed WHERE action = 'deleted'")}
+    
+    # The cursor only ever points at a comment a --no-delete run edited and kept. A
+    # deleting run has to list those again to delete them, so it starts from scratch
+    if delete_after_edit:
+        latest_seen = None
+        if not dry_run:
+            clear_latest_seen(conn)
+    else:
+        latest_seen = get_latest_seen(conn)
+    finished = {}  # comment id -> action recorded this run
     
     # Counter for statistics
-    processed = 0
-    edited = 0
-    deleted = 0
-    skipped = 0
-    failed = 0
+    stats = Counter()
     all_comments = []  # Initialize for exception handling
+    fetch_error = None  # Raised after the summary if streaming the listing fails
     
-    try:
-        # Get all comments and reverse to start from oldest
-        print("Fetching all comments...")
-        all_comments = list(user.comments.new(limit=None))
-        all_comments.reverse()  # Now oldest comments are first
-        print(f"Found {len(all_comments)} total comments")
-        
-        # Iterate through all comments (oldest first)
-        for comment in all_comments:
+    # Edits and deletes run on a thread pool; the controller decides how many are in flight
+    # and the bucket how quickly they may start
+    controller = ConcurrencyController(min(INITIAL_CONCURRENCY, max_concurrency), max_concurrency)
+    bucket = TokenBucket()
+    pending = {}
+    
+    def collect(return_when):
+        """Record the outcome of finished edit/delete tasks"""
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            comment, action = pending.pop(future)
+            if future.cancelled():
+                continue
             try:
-                # Delete if already edited to our text
-                if comment.body == edit_text:
-                    print(f"Found already edited comment: {comment.id}")
-                    if not dry_run:
-                        comment.delete()
-                        print("✓ Deleted previously edited comment")
-                        deleted += 1
-                        time.sleep(1)
-                    else:
-                        print("[DRY RUN] Would delete this previously edited comment")
-                    processed += 1
-                    continue
-                
-                # Display comment info
-                print(f"\nProcessing comment ID: {comment.id}")
-                print(f"Subreddit: r/{comment.subreddit}")
-                print(f"Original text preview: {comment.body[:50]}...")
-                
-                # Calculate comment age
-                comment_date = datetime.fromtimestamp(comment.created_utc)
-                comment_age_days = (datetime.now() - comment_date).days
-                print(f"Comment age: {comment_age_days} days")
-                
-                # Skip if comment is too recent
-                if comment_age_days <= days_threshold:
-                    print(f"✓ Skipping comment (only {comment_age_days} days old, threshold is {days_threshold})")
-                    skipped += 1
-                    continue
-                
-                if not dry_run:
-                    # Edit the comment
-                    comment.edit(edit_text)
-                    print("✓ Comment edited")
-                    edited += 1
-                    
-                    # Wait a moment for Reddit to process the edit
-                    time.sleep(1)
-                    
-                    # Delete if requested
-                    if delete_after_edit:
-                        comment.delete()
-                        print("✓ Comment deleted")
-                        deleted += 1
-                        
-                        # Rate limiting - Reddit has API limits
-                        time.sleep(1)
-                else:
-                    print(f"[DRY RUN] Would edit and {'delete' if delete_after_edit else 'keep'} this comment ({comment_age_days} days old)")
-                
-                processed += 1
-                
-                # Progress update every 10 comments
-                if processed % 10 == 0:
-                    print(f"\n--- Processed {processed} comments so far ---\n")
-                    
+                latency = future.result()
+            except Interrupted:
+                continue
+            except (TooManyRequests, ServerError, PRAWException) as e:
+                controller.record_failure()
+                logger.error("✗ Error processing comment %s: %s (concurrency now %d)", comment.id, e, controller.limit)
+                stats["failed"] += 1
+                continue
             except Exception as e:
-                print(f"✗ Error processing comment {comment.id}: {str(e)}")
-                failed += 1
-                # Continue with next comment even if one fails
+                logger.error("✗ Error processing comment %s: %s", comment.id, e)
+                stats["failed"] += 1
                 continue
+            
+            controller.record_success(latency)
+            if action == "delete":
+                logger.info("✓ Deleted previously edited comment %s", comment.id)
+                stats["deleted"] += 1
+                stats["previously_edited"] += 1
+            elif action == "delete_unedited":
+                logger.info("✓ Comment %s deleted", comment.id)
+                stats["deleted"] += 1
+            else:
+                logger.info("✓ Comment %s edited%s", comment.id, " and deleted" if delete_after_edit else "")
+                stats["edited"] += 1
+                if delete_after_edit:
+                    stats["deleted"] += 1
+            stats["processed"] += 1
+            finished[comment.id] = "deleted" if action != "edit" or delete_after_edit else "edited"
+            record_processed(conn, comment.id, finished[comment.id])
+            
+            # Batch commits rather than syncing the database for every comment
+            if stats["processed"] % DB_COMMIT_EVERY == 0:
+                conn.commit()
+            
+            # Progress update every 10 comments
+            if stats["processed"] % 10 == 0:
+                logger.info("--- Processed %d comments so far ---", stats["processed"])
+    
+    def submit(task, comment, action, *args):
+        """Queue a task once the controller allows another request in flight"""
+        while len(pending) >= controller.limit:
+            collect(FIRST_COMPLETED)
+        pending[executor.submit(task, bucket, comment, *args)] = (comment, action)
+    
+    # Delete, or edit (and optionally delete), comments older than the threshold
+    if not edit_first:
+        planned = "delete"
+    else:
+        planned = f"edit and {'delete' if delete_after_edit else 'keep'}"
+    dry_run_note = f"\n[DRY RUN] Would {planned} this comment" if dry_run else ""
+    
+    def process_old(comment):
+        """Log an old comment and queue its edit and/or delete"""
+        try:
+            # One log record per comment; arguments are only formatted when INFO is enabled
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Processing comment ID: %s (r/%s, %d days old)\nOriginal text preview: %.50s...%s",
+                    comment.id,
+                    comment.subreddit,
+                    int(now_ts - comment.created_utc) // SECONDS_PER_DAY,
+                    comment.body,
+                    dry_run_note,
+                )
+            
+            if dry_run:
+                stats["processed"] += 1
+            elif edit_first:
+                submit(_edit_and_maybe_delete, comment, "edit", edit_text, delete_after_edit)
+            else:
+                submit(_delete, comment, "delete_unedited")
+                
+        except Exception as e:
+            logger.error("✗ Error processing comment %s: %s", comment.id, e)
+            stats["failed"] += 1
+    
+    def keep_already_edited(comment):
+        """Leave a comment that already carries edit_text alone when not deleting"""
+        stats["already_edited"] += 1
+        # Counts as handled, so the listing cursor can move past it
+        finished[comment.id] = "edited"
+    
+    _interrupted.clear()
+    executor = ThreadPoolExecutor(max_workers=max_concurrency, initializer=_init_worker, initargs=(reddit_factory,))
+    try:
+        comments = iter_user_comments(reddit, user, latest_seen, use_archive, processed_ids)
+        
+        if stream:
+            # Fetch on a background thread while this one dispatches work. The listing
+            # comes newest first, so too-recent comments are skipped one by one
+            is_already_edited = already_edited_check(edit_text, delete_after_edit)
+            comment_queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+            errors = []
+            producer = threading.Thread(target=_produce_comments, args=(comments, comment_queue, errors), daemon=True)
+            producer.start()
+            for comment in iter(comment_queue.get, None):
+                all_comments.append(comment)
+                if comment.created_utc >= threshold_ts:
+                    stats["skipped"] += 1
+                elif comment.id in processed_ids:
+                    stats["previously_deleted"] += 1
+                elif not is_already_edited(comment):
+                    process_old(comment)
+                elif not delete_after_edit:
+                    keep_already_edited(comment)
+                elif dry_run:
+                    logger.info("[DRY RUN] Would delete previously edited comment %s", comment.id)
+                    stats["processed"] += 1
+                else:
+                    submit(_delete, comment, "delete")
+            if errors:
+                # Finish and record what was already submitted before reporting it
+                fetch_error = errors[0]
+            all_comments.sort(key=lambda c: c.created_utc)
+            logger.info("Found %d total comments", len(all_comments))
+        else:
+            # Sort oldest first in a single pass over the listing
+            all_comments = sorted(comments, key=lambda c: c.created_utc)
+            logger.info("Found %d total comments", len(all_comments))
+            
+            to_delete_only, to_edit, stats["skipped"], stats["previously_deleted"] = partition_comments(
+                all_comments, edit_text, threshold_ts, processed_ids, include_known_texts=delete_after_edit
+            )
+            logger.info("Already edited: %d, to edit: %d, too recent: %d", len(to_delete_only), len(to_edit), stats["skipped"])
+            
+            # Delete comments already edited to our text, unless nothing may be deleted
+            if not delete_after_edit:
+                for comment in to_delete_only:
+                    keep_already_edited(comment)
+            elif dry_run:
+                logger.info("[DRY RUN] Would delete %d previously edited comments", len(to_delete_only))
+                stats["processed"] += len(to_delete_only)
+            else:
+                for comment in to_delete_only:
+                    submit(_delete, comment, "delete")
+            
+            for comment in to_edit:
+                process_old(comment)
+        
+        # Wait for the remaining edits and deletes
+        if pending:
+            collect(ALL_COMPLETED)
+        
+        # Let the next run stop listing at the newest comment handled here. A partial
+        # listing says nothing about older comments, so it can't move the cursor
+        new_latest_seen = next_latest_seen(all_comments, finished) if fetch_error is None else None
+        if new_latest_seen and not dry_run:
+            set_latest_seen(conn, new_latest_seen)
     
     except KeyboardInterrupt:
-        print("\n\nScript interrupted by user")
+        logger.warning("Script interrupted by user")
+        _interrupted.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        # Save what's recorded so far in case shutdown is interrupted too
+        conn.commit()
+    finally:
+        executor.shutdown()
+        # Record edits and deletes that finished after an interrupt
+        if pending:
+            collect(ALL_COMPLETED)
+        conn.commit()
+        conn.close()
     
     # Final statistics
-    print(f"\n{'='*50}")
-    print(f"Processing complete!")
+    processed = stats["processed"]
+    edited = stats["edited"]
+    deleted = stats["deleted"]
+    summary = ["=" * 50, "Processing complete!" if fetch_error is None else "Processing stopped: fetching comments failed"]
     if all_comments:
-        print(f"Total comments found: {len(all_comments)}")
-    print(f"Comments processed: {processed}")
-    print(f"Comments skipped (too recent): {skipped}")
+        summary.append(f"Total comments found: {len(all_comments)}")
+    summary.append(f"Comments processed: {processed}")
+    summary.append(f"Comments skipped (too recent): {stats['skipped']}")
+    if stats["already_edited"]:
+        summary.append(f"Comments skipped (already edited): {stats['already_edited']}")
+    if stats["previously_deleted"]:
+        summary.append(f"Comments skipped (deleted in an earlier run): {stats['previously_deleted']}")
     if not dry_run:
-        print(f"Comments edited: {edited}")
-        print(f"Comments deleted: {deleted}")
-        if deleted > edited:
-            print(f"  - Previously edited: {deleted - edited}")
-            print(f"  - Newly processed: {edited}")
+        summary.append(f"Comments edited: {edited}")
+        summary.append(f"Comments deleted: {deleted}")
+        if stats["previously_edited"]:
+            summary.append(f"  - Previously edited: {stats['previously_edited']}")
+            summary.append(f"  - Newly processed: {deleted - stats['previously_edited']}")
     else:
-        print(f"Comments that would be processed: {processed}")
-    print(f"Failed: {failed}")
-    print(f"{'='*50}\n")
+        summary.append(f"Comments that would be processed: {processed}")
+    summary.append(f"Failed: {stats['failed']}")
+    summary.append("=" * 50)
+    print("\n".join(summary))
+    
+    if fetch_error is not None:
+        raise fetch_error
 
 def main():
     """Main function to run the script"""
     
-    print("Reddit Comment Privacy Script")
-    print("="*50)
-    
-    # Safety confirmation
-    print("\nThis script will:")
-    print("1. Process comments from oldest to newest")
-    print("2. Delete any comments already edited to the replacement text")
-    print("3. Leave recent comments (30 days or newer) completely untouched")
-    print("4. Edit older comments to remove content")
-    print("5. Optionally delete the edited older comments")
-    print("\nThis action cannot be undone!")
-    
-    # Get user preferences
-    edit_text = input("\nEnter replacement text (default 'F'): ").strip() or "F"
-    
-    days_input = input("Only process comments older than X days (default 30): ").strip()
-    days_threshold = int(days_input) if days_input.isdigit() else 30
+    parser = argparse.ArgumentParser(
+        description="Edit and delete your Reddit comments older than a number of days",
+        epilog="Credentials are read from the REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, "
+        "REDDIT_USERNAME and REDDIT_PASSWORD environment variables.",
+    )
+    parser.add_argument("--edit-text", default="F", help="Text to replace comments with (default: F)")
+    parser.add_argument("--days", type=int, default=30, help="Only process comments older than this many days (default: 30)")
+    parser.add_argument("--no-delete", action="store_true", help="Only edit old comments, don't delete them")
+    parser.add_argument(
+        "--paranoid-overwrite",
+        action="store_true",
+        help="Edit old comments to the replacement text before deleting them (default: just delete)",
+    )
+    parser.add_argument("--execute", action="store_true", help="Actually make changes; without this only a dry run is done")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENCY,
+        help=f"Maximum edit/delete requests in flight at once (default: {MAX_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Start editing/deleting while comments are still being fetched (processes newest first)",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Only show warnings, errors and the final summary")
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Also find comments beyond Reddit's ~1000 comment listing limit via the Arctic Shift archive",
+    )
+    args = parser.parse_args()
+    if args.concurrency < MIN_CONCURRENCY:
+        parser.error(f"--concurrency must be at least {MIN_CONCURRENCY}")
+    if args.days < 0:
+        parser.error("--days must not be negative")
     
-    delete_input = input("Delete comments after editing? (y/n, default y): ").strip().lower()
-    delete_after_edit = delete_input != 'n'
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s", stream=sys.stdout)
     
-    dry_run_input = input("Do a dry run first? (y/n, default y): ").strip().lower()
-    dry_run = dry_run_input != 'n'
+    edit_text = args.edit_text
+    days_threshold = args.days
+    delete_after_edit = not args.no_delete
+    dry_run = not args.execute
     
-    if not dry_run:
-        print(f"\nSettings:")
-        print(f"- Replacement text: '{edit_text}'")
-        print(f"- Process comments older than: {days_threshold} days")
-        print(f"- Delete after edit: {delete_after_edit}")
-        confirm = input("\nAre you SURE you want to proceed? Type 'YES' to confirm: ").strip()
-        if confirm != "YES":
-            print("Operation cancelled.")
-            sys.exit(0)
+    logger.info(
+        "Settings:\n- Replacement text: '%s'\n- Process comments older than: %d days\n- Delete after edit: %s",
+        edit_text,
+        days_threshold,
+        delete_after_edit,
+    )
     
     try:
         # Create Reddit instance
-        print("\nConnecting to Reddit...")
+        logger.info("Connecting to Reddit...")
         reddit = create_reddit_instance()
         
         # Verify authentication
         user = reddit.user.me()
-        print(f"✓ Successfully authenticated as: {user.name}")
+        logger.info("✓ Successfully authenticated as: %s", user.name)
         
         # Process comments
-        print(f"\n{'Starting DRY RUN' if dry_run else 'Starting processing'}...")
-        process_comments(reddit, edit_text, delete_after_edit, dry_run, days_threshold)
+        logger.info("%s...", "Starting DRY RUN" if dry_run else "Starting processing")
+        process_comments(
+            reddit,
+            edit_text,
+            delete_after_edit,
+            dry_run,
+            days_threshold,
+            use_archive=args.archive,
+            max_concurrency=args.concurrency,
+            overwrite_before_delete=args.paranoid_overwrite,
+            stream=args.stream,
+        )
         
         if dry_run:
-            print("\nDry run complete. Run again with dry_run = n to actually make changes.")
+            print("\nDry run complete. Run again with --execute to actually make changes.")
             
     except Exception as e:
-        print(f"\n✗ Fatal error: {str(e)}")
-        print("\nMake sure you have:")
-        print("1. Installed PRAW: pip install praw")
-        print("2. Created a Reddit app at https://www.reddit.com/prefs/apps")
-        print("3. Entered your credentials correctly in the script")
+        logger.error(
+            "✗ Fatal error: %s\n\nMake sure you have:\n"
+            "1. Installed PRAW: pip install praw\n"
+            "2. Created a Reddit app at https://www.reddit.com/prefs/apps\n"
+            "3. Set the REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USERNAME and REDDIT_PASSWORD environment variables",
+            e,
+        )
         sys.exit(1)
 
 if __name__ == "__main__":
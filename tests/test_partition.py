@@ -0,0 +1,91 @@
+"""Tests for partition_comments, using stub comments instead of Reddit"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_privacy_script import SECONDS_PER_DAY, partition_comments
+
+NOW = 1_700_000_000
+THRESHOLD_TS = NOW - 30 * SECONDS_PER_DAY
+
+def make_comment(comment_id, days_old, body="an original comment"):
+    """Return a stand-in for a PRAW comment"""
+    return SimpleNamespace(id=comment_id, created_utc=NOW - days_old * SECONDS_PER_DAY, body=body)
+
+def test_stops_at_first_recent_comment_and_counts_the_rest_as_skipped():
+    comments = [
+        make_comment("a", 100),
+        make_comment("b", 40),
+        make_comment("c", 10),
+        # Would be an already edited comment, but it is too recent to touch
+        make_comment("d", 5, body="F"),
+        make_comment("e", 1),
+    ]
+    
+    to_delete_only, to_edit, skipped, previously_deleted = partition_comments(comments, "F", THRESHOLD_TS)
+    
+    assert [c.id for c in to_edit] == ["a", "b"]
+    assert to_delete_only == []
+    assert skipped == 3
+    assert previously_deleted == 0
+
+def test_all_comments_old_enough_skips_nothing():
+    comments = [make_comment("a", 90), make_comment("b", 60)]
+    
+    _, to_edit, skipped, _ = partition_comments(comments, "F", THRESHOLD_TS)
+    
+    assert [c.id for c in to_edit] == ["a", "b"]
+    assert skipped == 0
+
+def test_excludes_comments_deleted_by_an_earlier_run():
+    comments = [make_comment("a", 90), make_comment("b", 80, body="F"), make_comment("c", 70)]
+    
+    to_delete_only, to_edit, skipped, previously_deleted = partition_comments(
+        comments, "F", THRESHOLD_TS, processed_ids={"a", "b"}
+    )
+    
+    assert to_delete_only == []
+    assert [c.id for c in to_edit] == ["c"]
+    assert previously_deleted == 2
+    assert skipped == 0
+
+def test_known_replacement_texts_count_as_already_edited():
+    comments = [
+        make_comment("a", 90, body="[deleted]"),
+        make_comment("b", 80, body="[removed]"),
+        make_comment("c", 70, body="."),
+        make_comment("d", 60, body="F"),
+        make_comment("e", 50, body="F."),
+    ]
+    
+    to_delete_only, to_edit, _, _ = partition_comments(comments, "F", THRESHOLD_TS)
+    
+    assert [c.id for c in to_delete_only] == ["a", "b", "c", "d"]
+    assert [c.id for c in to_edit] == ["e"]
+
+def test_only_edit_text_counts_without_known_texts():
+    comments = [make_comment("a", 90, body="."), make_comment("b", 80, body="F"), make_comment("c", 70, body="[deleted]")]
+    
+    to_delete_only, to_edit, _, _ = partition_comments(comments, "F", THRESHOLD_TS, include_known_texts=False)
+    
+    assert [c.id for c in to_delete_only] == ["b"]
+    assert [c.id for c in to_edit] == ["a", "c"]
+
+def test_length_guard_allows_a_long_custom_edit_text():
+    edit_text = "This comment was removed by its author to protect their privacy."
+    comments = [
+        make_comment("a", 90, body=edit_text),
+        # Longer than every replacement text, so the set lookup is skipped
+        make_comment("b", 80, body=edit_text + " Extra text"),
+        # Same length as edit_text but different
+        make_comment("c", 70, body="x" * len(edit_text)),
+        make_comment("d", 60, body="[removed]"),
+    ]
+    
+    to_delete_only, to_edit, _, _ = partition_comments(comments, edit_text, THRESHOLD_TS)
+    
+    assert [c.id for c in to_delete_only] == ["a", "d"]
+    assert [c.id for c in to_edit] == ["b", "c"]